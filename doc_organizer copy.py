@@ -1,8 +1,8 @@
 import os
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer
 from openai import OpenAI
 from dotenv import load_dotenv
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 from pydantic import BaseModel
 import logging
 import colorama
@@ -14,6 +14,9 @@ CONFIG = {
     'log_level': logging.DEBUG
 }
 
+# Heading tags that start a new section
+HEADING_TAGS = frozenset({'h1', 'h2', 'h3', 'h4'})
+
 # Initialize colorama for Windows support
 colorama.init()
 
@@ -61,8 +64,9 @@ logger.addHandler(console_handler)
 class HTMLParser:
     """Handles parsing and sectioning of HTML documentation."""
     
-    def __init__(self, html_content: str):
-        self.soup = BeautifulSoup(html_content, 'html.parser')
+    def __init__(self, html_content: Union[str, bytes]):
+        # Only build the tree for <body>; <head> scripts/styles are never sectioned
+        self.soup = BeautifulSoup(html_content, 'lxml', parse_only=SoupStrainer('body'))
         
     def split_into_sections(self) -> List[Dict[str, str]]:
         """
@@ -70,26 +74,33 @@ class HTMLParser:
         Returns a list of dictionaries containing section title and content.
         """
         sections = []
-        # Find all heading tags in the document
-        headings = self.soup.find_all(['h1', 'h2', 'h3', 'h4'])
+        _str = str
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         
-        for i, heading in enumerate(headings):
+        # Find all heading tags in the document
+        for heading in self.soup.find_all(HEADING_TAGS):
             title = heading.get_text().strip()
             content = []
+            append = content.append
             
-            # Get all elements between this heading and the next one
-            current = heading.next_sibling
-            while current and current not in headings:
-                if str(current).strip():  # Only add non-empty elements
-                    content.append(str(current))
-                current = current.next_sibling if hasattr(current, 'next_sibling') else None
+            # Get all elements between this heading and the next one.
+            # Checking the tag name (a set lookup) instead of `in headings` avoids
+            # comparing each sibling against every heading, so the walk stays linear.
+            for sibling in heading.next_siblings:
+                if sibling.name in HEADING_TAGS:
+                    break
+                # Strings are already text; only tags need serializing (once)
+                html = sibling if isinstance(sibling, NavigableString) else _str(sibling)
+                if html.strip():  # Only add non-empty elements
+                    append(html)
             
             if title and content:  # Only add sections with both title and content
                 sections.append({
                     'title': title,
                     'content': '\n'.join(content)
                 })
-                logger.debug(f"Found section: {title}")
+                if debug_enabled:
+                    logger.debug("Found section: %s", title)
                 
         logger.info(f"Found {len(sections)} sections in HTML")
         return sections
@@ -130,7 +141,7 @@ class GPTProcessor:
                 logger.warning(f"Model refused to process section '{section['title']}': {completion.choices[0].message.refusal}")
                 return None
             
-            result = completion.choices[0].message.parsed.dict()
+            result = completion.choices[0].message.parsed.model_dump()
             logger.info(f"Successfully processed section: {section['title']} -> {result['filename']}")
             return result
             
@@ -221,11 +232,11 @@ class DocumentationOrganizer:
         """
         logger.info(f"Processing file: {input_file}")
         
-        # Read and parse the HTML file
-        with open(input_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        # Read the raw bytes and let lxml decode them (no separate Python-level decode)
+        with open(input_file, 'rb') as f:
+            html_bytes = f.read()
             
-        self.html_parser = HTMLParser(html_content)
+        self.html_parser = HTMLParser(html_bytes)
         sections = self.html_parser.split_into_sections()
         logger.info(f"Found {len(sections)} sections in file")
         
@@ -1,16 +1,43 @@
 import os
+import re
+import glob
+import queue
+import atexit
+import argparse
+import time
+import sqlite3
+import hashlib
+import asyncio
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
 import colorama
 from colorama import Fore, Style
-from typing import Dict, List, Optional
+from typing import IO, Dict, Iterator, List, Optional, Tuple, Union
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
-# BeautifulSoup for HTML parsing
-from bs4 import BeautifulSoup
+# Fast JSON (de)serialization for the cache and Batch API files
+import orjson
+
+# Vectorised similarity search for the semantic cache tier
+import numpy as np
+
+# BeautifulSoup for HTML parsing (lxml backend, html.parser if lxml is missing)
+from bs4 import BeautifulSoup, FeatureNotFound, NavigableString, PageElement, SoupStrainer, Tag
+
+# Local HTML -> Markdown conversion, so GPT receives compact Markdown instead of HTML
+from markdownify import MarkdownConverter, ATX
+
+# Deterministic, filesystem-safe filenames from section titles
+from slugify import slugify
 
 # OpenAI client (assume you have a valid client that supports .beta.chat.completions.parse)
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI
 
 # Token counting (assume your environment supports tiktoken for your custom GPT models)
 import tiktoken
@@ -20,19 +47,53 @@ import tiktoken
 # ---------------------------------------------------------------------------
 CONFIG = {
     'gpt_model': 'gpt-4o-mini',  # e.g. "gpt-4o" or "gpt-4o-mini"
-    'log_level': logging.DEBUG,
+    'log_level': logging.INFO,  # Set to logging.DEBUG for verbose logs/latest.log output
+    'max_concurrency': 20,  # Max in-flight GPT requests in the async pipeline
+    'max_retries': 5,  # OpenAI client retries (exponential backoff) on 429s/5xx
+    # Sections with more content tokens than this are split into chunks of at most
+    # this size, processed in parallel and merged; keeps requests fast and keeps the
+    # echoed Markdown well inside max_output_tokens
+    'max_section_tokens': 3000,
+    # The model echoes content back, so each request's max_tokens (and the TPM budget
+    # it reserves) is content tokens * ratio + margin per section, capped at max_output_tokens
+    'output_token_ratio': 1.5,
+    'output_token_margin': 256,
+    'http_max_connections': 100,  # Keep-alive pool shared by all async GPT calls (HTTP/2)
+    'stream_responses': True,  # Stream async completions instead of waiting for one response body
+    # Small sections are packed into one request (up to this many, hard cap 16) so the
+    # shared instructions are sent once per group; set to 1 for one section per request
+    'sections_per_request': 8,
+    'cache': {
+        'enabled': True,  # Reuse results for sections with identical title + content
+        # Semantic tier: reuse results of near-duplicate sections by embedding similarity.
+        # Off by default since similar endpoint pages would share each other's output.
+        'semantic': False,
+        'similarity_threshold': 0.9,
+        'embedding_model': 'text-embedding-3-small'
+    },
+    'batch_min_sections': 20,  # Smaller docs skip the Batch API and run synchronously
+    'batch_poll_interval': 30,  # Seconds between Batch API status checks
     'model_config': {
+        # Rate limits default to usage tier 1; raise them to match your account
         'gpt-4o-mini': {
             'context_window': 128000,
-            'max_output_tokens': 16384
+            'max_output_tokens': 16384,
+            'requests_per_minute': 500,
+            'tokens_per_minute': 200000
         },
         'gpt-4o': {
             'context_window': 128000,
-            'max_output_tokens': 16384
+            'max_output_tokens': 16384,
+            'requests_per_minute': 500,
+            'tokens_per_minute': 30000
         }
     }
 }
 
+# Bump whenever _create_prompt, ProcessedSection or the section Markdown built by
+# HTMLParser changes; invalidates cached results
+PROMPT_VERSION = 3
+
 
 # ---------------------------------------------------------------------------
 # Logging Setup
@@ -59,19 +120,27 @@ class ColoredFormatter(logging.Formatter):
 logs_dir = os.path.join(os.path.dirname(__file__), 'logs')
 os.makedirs(logs_dir, exist_ok=True)
 
+# Cache directory, persisted across runs
+cache_dir = os.path.join(os.path.dirname(__file__), 'cache')
+
 logger = logging.getLogger()
 logger.setLevel(CONFIG['log_level'])
 
+# Parser worker processes re-import this module on spawn-based platforms. The process
+# name is set before that import, unlike multiprocessing.parent_process()
+is_worker_process = multiprocessing.current_process().name != 'MainProcess'
+
 # File handler with UTF-8 encoding
 file_handler = logging.FileHandler(
     os.path.join(logs_dir, 'latest.log'),
-    mode='w',  # Overwrite previous log
+    # Overwrite previous log; parser worker processes append instead of truncating it
+    mode='a' if is_worker_process else 'w',
     encoding='utf-8'  # Specify UTF-8 encoding
 )
+file_handler.setLevel(logging.DEBUG)  # Gets everything the root logger lets through
 file_handler.setFormatter(
     logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 )
-logger.addHandler(file_handler)
 
 # Console handler (colored) with UTF-8 encoding
 if os.name == 'nt':  # Windows
@@ -81,10 +150,22 @@ if os.name == 'nt':  # Windows
     sys.stderr.reconfigure(encoding='utf-8')
 
 console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)  # Keep the console readable even at DEBUG
 console_handler.setFormatter(
     ColoredFormatter('%(levelname)s: %(message)s')
 )
-logger.addHandler(console_handler)
+
+if not is_worker_process:
+    # Log calls only enqueue the record; a background thread does the file/console I/O
+    log_queue = queue.Queue(-1)
+    log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)  # Flushes queued records on exit
+    logger.addHandler(QueueHandler(log_queue))
+else:
+    # Parser worker processes exit without running atexit hooks, so they log directly
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
 
 # ---------------------------------------------------------------------------
 # Data Models
@@ -98,60 +179,134 @@ class DocumentSection:
         self.content: List[str] = []
         self.subsections: List['DocumentSection'] = []
         self.parent: Optional['DocumentSection'] = None
+        # Memoized get_full_content(); ancestors embed it, so flattening reuses it
+        self._full_cache: Optional[str] = None
+
+    def _invalidate(self):
+        """Drop the memoized full content of this section and its ancestors."""
+        node = self
+        while node is not None and node._full_cache is not None:
+            node._full_cache = None
+            node = node.parent
 
     def add_content(self, content: str):
         """Add content to this section."""
         if content.strip():
             self.content.append(content.strip())
+            self._invalidate()
 
     def add_subsection(self, section: 'DocumentSection'):
         """Add a subsection and set its parent."""
         section.parent = self
         self.subsections.append(section)
+        self._invalidate()
 
     def get_full_content(self) -> str:
         """Get all content including subsections recursively."""
-        lines = []
+        if self._full_cache is not None:
+            return self._full_cache
+
+        # One flat list of Markdown blocks and a single join (no per-level intermediate strings)
+        blocks = []
         # This section’s content
         if self.title:
-            lines.append(f"## {self.title}\n")  # A top-level heading in Markdown could be H2, etc.
-        lines.append("\n".join(self.content))
+            blocks.append(f"## {self.title}")  # A top-level heading in Markdown could be H2, etc.
+        blocks.extend(self.content)
 
-        # Subsections’ content
-        for subsection in self.subsections:
-            lines.append(subsection.get_full_content())
+        # Subsections’ content (memoized, so each subtree is built once)
+        blocks.extend(subsection.get_full_content() for subsection in self.subsections)
 
-        return "\n".join(lines)
+        # Blank lines between blocks, so paragraphs, lists and tables stay separate in Markdown
+        self._full_cache = "\n\n".join(blocks)
+        return self._full_cache
 
     def get_breadcrumbs(self) -> List[str]:
-        """Get the full path of section titles from root to this section."""
-        if self.parent is None:
-            return [self.title]
-        return self.parent.get_breadcrumbs() + [self.title]
+        """Get the full path of section titles from the top level down to this section."""
+        breadcrumbs = []
+        node = self
+        while node is not None and node.title != "ROOT":
+            breadcrumbs.append(node.title)
+            node = node.parent
+        breadcrumbs.reverse()
+        return breadcrumbs
 
 
 class ProcessedSection(BaseModel):
+    # The output filename is derived locally from the section title (see section_filename)
     section_type: str
     related_endpoints: List[str]
-    filename: str
     content: str
 
 
+class BatchResult(BaseModel):
+    # One ProcessedSection per packed section, in prompt order
+    items: List[ProcessedSection]
+
+
+def section_filename(title: str) -> str:
+    """Filesystem-safe Markdown filename for a section title."""
+    return f"{slugify(title, max_length=60) or 'section'}.md"
+
+
+def processed_section_response_format() -> Dict:
+    """JSON-schema response_format for ProcessedSection, for raw (non-parse) requests."""
+    schema = ProcessedSection.model_json_schema()
+    schema['additionalProperties'] = False
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "ProcessedSection",
+            "strict": True,
+            "schema": schema
+        }
+    }
+
+
 # ---------------------------------------------------------------------------
 # HTMLParser
 # ---------------------------------------------------------------------------
+# Heading tag -> section level (h1=1, h2=2, etc.); any other tag is level 0
+_HEADING_LEVELS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+
+
 class HTMLParser:
     """Handles parsing and sectioning of HTML documentation by headings."""
 
-    def __init__(self, html_content: str):
-        self.soup = BeautifulSoup(html_content, 'html.parser')
+    # Page chrome (and inert <template> markup) that never belongs in a documentation section
+    NOISE_TAGS = ['script', 'style', 'nav', 'noscript', 'template']
+    HEADING_TAGS = list(_HEADING_LEVELS)
 
-    def _get_heading_level(self, tag_name: str) -> int:
-        """Get numeric level from heading tag (h1=1, h2=2, etc.)."""
-        # e.g., "h2" -> 2
-        if tag_name.lower().startswith('h') and tag_name[1:].isdigit():
-            return int(tag_name[1:])
-        return 0
+    def __init__(self, html_content: Union[str, bytes, IO[bytes]]):
+        """
+        `html_content` may be markup or an open binary file; passing the file (or bytes)
+        lets lxml do the decoding, with encoding sniffed from the document itself.
+        """
+        # Only build the tree for <body>; <head> scripts/styles are never sectioned
+        try:
+            self.soup = BeautifulSoup(html_content, 'lxml', parse_only=SoupStrainer('body'))
+        except FeatureNotFound:
+            logger.warning("lxml is not installed; falling back to the (slower) html.parser")
+            # No <body> strainer here: unlike lxml, html.parser doesn't add a missing <body>,
+            # so a fragment would parse to an empty soup
+            self.soup = BeautifulSoup(html_content, 'html.parser')
+        for tag in self.soup.find_all(self.NOISE_TAGS):
+            tag.decompose()
+        self.markdown = MarkdownConverter(heading_style=ATX)
+
+    @classmethod
+    async def create(cls, html_content: Union[str, bytes, IO[bytes]]) -> 'HTMLParser':
+        """Parse HTML in a worker thread so in-flight GPT calls keep running."""
+        return await asyncio.to_thread(cls, html_content)
+
+    @staticmethod
+    def _has_content(element: Tag) -> bool:
+        """Whether an element renders to any Markdown: some text, or an image."""
+        # The first non-blank string settles it; no need to serialize the element
+        return (
+            next(element.stripped_strings, None) is not None
+            or element.name == 'img'
+            or element.find('img') is not None
+        )
 
     def build_section_tree(self) -> DocumentSection:
         """
@@ -160,7 +315,12 @@ class HTMLParser:
         """
         # We'll create a root with level=0 that isn't an actual doc section
         root = DocumentSection(title="ROOT", level=0)
-        current_sections = {0: root}  # Map heading level -> DocumentSection
+        # Active section per heading level (index 0 is the root), and the deepest of them
+        current: List[Optional[DocumentSection]] = [root, None, None, None, None, None, None]
+        deepest = root
+        # (section, node) pairs, rendered to Markdown after the walk: markdownify drops
+        # whitespace-only text nodes from the tree, which would derail a live traversal
+        pending_content: List[Tuple[DocumentSection, PageElement]] = []
 
         # Choose the main container: often <main>, <article>, or body
         main_content = self.soup.find(['main', 'article']) or self.soup.body
@@ -168,54 +328,59 @@ class HTMLParser:
             logger.warning("No main/article/body found, defaulting to full HTML.")
             main_content = self.soup
 
-        for element in main_content.find_all():
-            level = self._get_heading_level(element.name)
+        # Only elements that contain a heading need to be descended into; every other
+        # block lies between two headings and is taken whole, as one piece of content
+        containers = set()
+        for heading in main_content.find_all(self.HEADING_TAGS):
+            for ancestor in heading.parents:
+                if id(ancestor) in containers or ancestor is main_content:
+                    break
+                containers.add(id(ancestor))
+
+        stack = [iter(main_content.children)]
+        while stack:
+            element = next(stack[-1], None)
+            if element is None:
+                stack.pop()
+                continue
 
-            if level > 0:
+            if not element.name:
+                # Loose text directly inside a container (comments etc. are skipped)
+                if type(element) is NavigableString and element.strip():
+                    pending_content.append((deepest, element))
+                continue
+
+            level = _HEADING_LEVELS.get(element.name, 0)
+            if level:
                 # This is a heading. Create a new DocumentSection
                 title_text = element.get_text().strip()
                 new_section = DocumentSection(title=title_text, level=level)
 
-                # Find the correct parent: the next heading up with a smaller level
+                # Find the correct parent: the nearest active section with a smaller level
                 parent_level = level - 1
-                while parent_level > 0 and parent_level not in current_sections:
-                    parent_level -= 1
-                while parent_level > 0 and current_sections[parent_level] is None:
+                while current[parent_level] is None:
                     parent_level -= 1
+                current[parent_level].add_subsection(new_section)
 
-                # If we can find an existing parent, add subsection
-                if parent_level >= 0 and current_sections.get(parent_level):
-                    current_sections[parent_level].add_subsection(new_section)
-                else:
-                    # Otherwise, attach to the root
-                    root.add_subsection(new_section)
+                # This heading is now the deepest active section; clear deeper levels
+                current[level] = new_section
+                for deeper in range(level + 1, len(current)):
+                    current[deeper] = None
+                deepest = new_section
 
-                # Update current_sections for this level
-                current_sections[level] = new_section
+            elif id(element) in containers:
+                stack.append(iter(element.children))
 
-                # Clear deeper levels
-                deeper = [lvl for lvl in current_sections if lvl > level]
-                for dlevel in deeper:
-                    current_sections[dlevel] = None
+            elif self._has_content(element):
+                # Not a heading: this is content of the deepest active section
+                pending_content.append((deepest, element))
 
+        # Convert to Markdown locally (code blocks become fenced blocks)
+        for section, node in pending_content:
+            if node.name:
+                section.add_content(self.markdown.process_tag(node, convert_as_inline=False))
             else:
-                # This is not a heading. Add content to the *deepest* active section
-                # (the highest level that isn't None)
-                deepest_section = None
-                for l in sorted(current_sections.keys(), reverse=True):
-                    if current_sections[l] is not None:
-                        deepest_section = current_sections[l]
-                        break
-                if deepest_section is not None and str(element).strip():
-                    # Special handling for code blocks
-                    if element.name in ['code', 'pre']:
-                        text = element.get_text()
-                        content_str = f"```\n{text.strip()}\n```"
-                    else:
-                        # Keep minimal HTML or just plaintext
-                        text = element.get_text("\n", strip=True)
-                        content_str = text
-                    deepest_section.add_content(content_str)
+                section.add_content(self.markdown.process_text(node))
 
         return root
 
@@ -223,11 +388,22 @@ class HTMLParser:
         """
         Flatten the hierarchical DocumentSection tree into a list of dicts:
         [
-          { "title": "Some Title", "content": "...", "breadcrumbs": [...] },
+          { "title": "Some Title", "content": "...", "breadcrumbs": [...], "filename": "some-title.md" },
           ...
         ]
+        Filenames are unique within the document; repeated titles get a numeric suffix.
         """
         flat_list = []
+        used_filenames = set()
+
+        def unique_filename(title: str) -> str:
+            base = section_filename(title)[:-len(".md")]
+            filename, counter = f"{base}.md", 1
+            while filename in used_filenames:
+                counter += 1
+                filename = f"{base}-{counter}.md"
+            used_filenames.add(filename)
+            return filename
 
         def traverse(section: DocumentSection):
             if section.title != "ROOT":
@@ -235,7 +411,8 @@ class HTMLParser:
                 flat_list.append({
                     "title": section.title,
                     "content": section.get_full_content(),
-                    "breadcrumbs": section.get_breadcrumbs()
+                    "breadcrumbs": section.get_breadcrumbs(),
+                    "filename": unique_filename(section.title)
                 })
             for child in section.subsections:
                 traverse(child)
@@ -251,68 +428,363 @@ class HTMLParser:
         return flat_sections
 
 
+# ---------------------------------------------------------------------------
+# RateLimiter
+# ---------------------------------------------------------------------------
+class RateLimiter:
+    """
+    Preemptive limiter for concurrent GPT calls: caps in-flight requests and
+    throttles dispatch against requests-per-minute and tokens-per-minute budgets,
+    so we wait locally instead of hitting 429s and backing off.
+    """
+
+    def __init__(self, max_concurrent: int, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._lock = asyncio.Lock()
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+
+    def _refill(self):
+        """Top up both buckets for the time elapsed since the last refill."""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_allowance = min(
+            self.requests_per_minute,
+            self._request_allowance + elapsed * self.requests_per_minute / 60
+        )
+        self._token_allowance = min(
+            self.tokens_per_minute,
+            self._token_allowance + elapsed * self.tokens_per_minute / 60
+        )
+
+    @asynccontextmanager
+    async def limit(self, tokens: int):
+        """Hold a concurrency slot and spend budget for one request of `tokens` tokens."""
+        # A single request can never need more than a full minute of budget
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._semaphore:
+            async with self._lock:
+                while True:
+                    self._refill()
+                    if self._request_allowance >= 1 and self._token_allowance >= tokens:
+                        break
+                    wait = max(
+                        (1 - self._request_allowance) * 60 / self.requests_per_minute,
+                        (tokens - self._token_allowance) * 60 / self.tokens_per_minute
+                    )
+                    logger.debug("Rate limit reached, waiting %.2fs", wait)
+                    await asyncio.sleep(wait)
+                self._request_allowance -= 1
+                self._token_allowance -= tokens
+            yield
+
+
+# ---------------------------------------------------------------------------
+# SectionCache
+# ---------------------------------------------------------------------------
+class SectionCache:
+    """
+    Persistent cache of processed sections in SQLite, with two tiers:
+    an exact match on the SHA-256 of model + prompt version + title + content,
+    and (optionally) a nearest-neighbour match on section embeddings above a
+    cosine threshold. Entries are scoped to the model and prompt version, so
+    changing either invalidates them.
+    """
+
+    def __init__(self, path: str, model: str, prompt_version: int, similarity_threshold: float = 0.9):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.namespace = f"{model}|{prompt_version}"
+        self.similarity_threshold = similarity_threshold
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result BLOB NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, namespace TEXT NOT NULL, vector BLOB NOT NULL)"
+        )
+        self.conn.commit()
+        # Semantic tier, loaded on first use: entry keys and their embeddings, one row each
+        self._keys: Optional[List[str]] = None
+        self._rows: List[np.ndarray] = []
+        self._matrix: Optional[np.ndarray] = None  # np.vstack(self._rows), rebuilt after puts
+
+    def key_for(self, section: Dict[str, str]) -> str:
+        """Exact-match cache key for a section."""
+        return hashlib.sha256(
+            f"{self.namespace}|{section['title']}|{section['content']}".encode('utf-8')
+        ).hexdigest()
+
+    def get(self, section: Dict[str, str]) -> Optional[Dict]:
+        """Exact lookup by model, prompt version, title and content."""
+        return self._get_by_key(self.key_for(section))
+
+    def _get_by_key(self, key: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def _load_vectors(self) -> Optional[np.ndarray]:
+        """Matrix of the cached embeddings (None if there are none), rows matching self._keys."""
+        if self._keys is None:
+            self._keys, self._rows = [], []
+            for key, vector in self.conn.execute(
+                "SELECT key, vector FROM embeddings WHERE namespace = ?", (self.namespace,)
+            ):
+                self._keys.append(key)
+                self._rows.append(np.frombuffer(vector, dtype=np.float32))
+        if self._matrix is None and self._rows:
+            self._matrix = np.vstack(self._rows)
+        return self._matrix
+
+    def _nearest_keys(self, keys: List[str], matrix: np.ndarray,
+                      embeddings: List[List[float]]) -> List[Optional[str]]:
+        """Key of the most similar cached entry above the threshold, per embedding."""
+        # OpenAI embeddings are unit-length, so the dot product is the cosine similarity
+        scores = np.asarray(embeddings, dtype=np.float32) @ matrix.T
+        best = scores.argmax(axis=1)
+        nearest = []
+        for row, index in enumerate(best):
+            score = scores[row, index]
+            if score >= self.similarity_threshold:
+                logger.debug("Semantic cache hit with similarity %.3f", score)
+                nearest.append(keys[index])
+            else:
+                nearest.append(None)
+        return nearest
+
+    async def find_similar_many(self, embeddings: List[List[float]]) -> List[Optional[Dict]]:
+        """
+        Return the cached result of the most similar section above the threshold for each
+        embedding (None where there is none). The similarity scan is one matrix product,
+        run in a worker thread; SQLite is only touched from the calling thread.
+        """
+        matrix = self._load_vectors()
+        if matrix is None or not embeddings:
+            return [None] * len(embeddings)
+        keys = await asyncio.to_thread(self._nearest_keys, list(self._keys), matrix, embeddings)
+        return [self._get_by_key(key) if key else None for key in keys]
+
+    def put(self, section: Dict[str, str], result: Dict, embedding: Optional[List[float]] = None):
+        """Store a result, plus the section embedding when the semantic tier is in use."""
+        key = self.key_for(section)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results (key, result) VALUES (?, ?)",
+            (key, orjson.dumps(result))
+        )
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, namespace, vector) VALUES (?, ?, ?)",
+                (key, self.namespace, vector.tobytes())
+            )
+            if self._keys is not None:
+                self._keys.append(key)
+                self._rows.append(vector)
+                self._matrix = None
+        self.conn.commit()
+
+
 # ---------------------------------------------------------------------------
 # GPTProcessor
 # ---------------------------------------------------------------------------
+@lru_cache(maxsize=8)
+def _get_encoder(model: str):
+    """tiktoken encoder for a model; loading the BPE ranks is slow, so load each once."""
+    return tiktoken.encoding_for_model(model)
+
+
+@lru_cache(maxsize=4096)
+def _count_tokens_cached(model: str, text: str) -> int:
+    """Token count of a text; sections and chunks are counted repeatedly, so memoize."""
+    return len(_get_encoder(model).encode(text))
+
+
+# Blank-line block separators, line breaks (to split an oversized block), and
+# fence lines (``` code blocks may contain blank lines)
+_PARA_RE = re.compile(r'\n{2,}')
+_LINE_RE = re.compile(r'\n')
+_FENCE_RE = re.compile(r'^[ \t]*```', re.MULTILINE)
+# A Markdown heading line on its own
+_HEADING_LINE_RE = re.compile(r'#{1,6} [^\n]*')
+
+
+def _iter_paragraphs(content: str, separator_re: re.Pattern = _PARA_RE) -> Iterator[str]:
+    """
+    Lazily yield the blank-line separated blocks of Markdown (or the pieces between
+    `separator_re` matches), keeping code fences whole.
+    """
+    block_start = 0
+    piece_start = 0
+    in_fence = False
+    for separator in separator_re.finditer(content):
+        # An odd number of fence lines opens or closes a code block
+        if len(_FENCE_RE.findall(content, piece_start, separator.start())) % 2:
+            in_fence = not in_fence
+        piece_start = separator.end()
+        if not in_fence:
+            yield content[block_start:separator.start()]
+            block_start = piece_start
+    yield content[block_start:]
+
+
 class GPTProcessor:
     """Handles interaction with GPT for processing documentation sections."""
 
     def __init__(self):
         load_dotenv()
-        self.client = OpenAI()  # We'll trust that you have an appropriate client
         self.model = CONFIG['gpt_model']
         self.model_config = CONFIG['model_config'][self.model]
-        self.tokenizer = tiktoken.encoding_for_model(self.model)
+        # Async resources are bound to an event loop; they're created on first use
+        # and released by aclose() (or `async with processor:`)
+        self._async_client: Optional[AsyncOpenAI] = None
+        self.rate_limiter = self._create_rate_limiter()
+        self.cache_config = CONFIG['cache']
+        self.cache = None
+        if self.cache_config['enabled']:
+            self.cache = SectionCache(
+                os.path.join(cache_dir, 'sections.sqlite3'),
+                model=self.model,
+                prompt_version=PROMPT_VERSION,
+                similarity_threshold=self.cache_config['similarity_threshold']
+            )
+        # Load the encoder now rather than on the first (concurrent) token count
+        _get_encoder(self.model)
 
         logger.info(f"Initialized GPTProcessor with model: {self.model}")
 
+    def _create_rate_limiter(self) -> RateLimiter:
+        return RateLimiter(
+            max_concurrent=CONFIG['max_concurrency'],
+            requests_per_minute=self.model_config['requests_per_minute'],
+            tokens_per_minute=self.model_config['tokens_per_minute']
+        )
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """
+        AsyncOpenAI client on one shared HTTP/2 connection pool, so concurrent
+        calls reuse warm TLS connections instead of handshaking per request.
+        """
+        if self._async_client is None:
+            http_client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=CONFIG['http_max_connections'],
+                    max_keepalive_connections=CONFIG['http_max_connections']
+                ),
+                timeout=httpx.Timeout(120.0, connect=10.0)
+            )
+            self._async_client = AsyncOpenAI(
+                http_client=http_client,
+                max_retries=CONFIG['max_retries']
+            )
+        return self._async_client
+
+    async def aclose(self):
+        """Close the async connection pool and reset loop-bound state."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        self.rate_limiter = self._create_rate_limiter()
+
+    async def __aenter__(self) -> 'GPTProcessor':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
     def _count_tokens(self, text: str) -> int:
         """Count tokens in a text string using tiktoken."""
-        return len(self.tokenizer.encode(text))
+        return _count_tokens_cached(self.model, text)
 
-    def _call_gpt(self, prompt: str, title: str) -> Optional[Dict]:
-        """Call GPT with the given prompt and return the parsed ProcessedSection dict."""
-        try:
-            logger.info(f"Processing section '{title}' with model {self.model}.")
-            logger.debug(f"Prompt length: {len(prompt)} chars, {self._count_tokens(prompt)} tokens")
-            
-            completion = self.client.beta.chat.completions.parse(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an API documentation expert."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format=ProcessedSection,
-                max_tokens=self.model_config['max_output_tokens']
+    def _build_messages(self, prompt: str) -> List[Dict[str, str]]:
+        """Chat messages sent for a single section prompt."""
+        return [
+            {"role": "system", "content": "You are an API documentation expert."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _max_output_tokens(self, content_tokens: int, sections: int = 1) -> int:
+        """max_tokens for a request echoing `content_tokens` of content over `sections` sections."""
+        return min(
+            self.model_config['max_output_tokens'],
+            int(content_tokens * CONFIG['output_token_ratio']) + CONFIG['output_token_margin'] * sections
+        )
+
+    def _completion_kwargs(self, prompt: str, max_tokens: int, response_format=ProcessedSection) -> Dict:
+        """Keyword arguments shared by the parse and stream structured-output calls."""
+        return dict(
+            model=self.model,
+            messages=self._build_messages(prompt),
+            response_format=response_format,
+            max_tokens=max_tokens
+        )
+
+    def _handle_completion(self, completion, title: str) -> Optional[BaseModel]:
+        """
+        Validate a parsed completion and return the parsed model (a ProcessedSection,
+        or the requested response_format), or None. Results stay pydantic models
+        until they leave GPTProcessor; see _combine_results.
+        """
+        # Debug the raw response (its repr is large, so only build it when it is logged)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Raw completion response: %r", completion)
+        
+        # Check for empty response
+        if not completion or not completion.choices:
+            logger.error(f"Empty completion response for section '{title}'")
+            return None
+
+        # Get the message and check if it contains the parsed data
+        message = completion.choices[0].message
+        
+        # Check for explicit refusal
+        if hasattr(message, 'refusal') and message.refusal:
+            logger.warning(
+                f"Model refused to process section '{title}': {message.refusal}"
             )
-            
-            # Debug the raw response
-            logger.debug(f"Raw completion response: {completion}")
-            
-            # Check for empty response
-            if not completion or not completion.choices:
-                logger.error(f"Empty completion response for section '{title}'")
-                return None
+            return None
 
-            # Get the message and check if it contains the parsed data
-            message = completion.choices[0].message
-            
-            # Check for explicit refusal
-            if hasattr(message, 'refusal') and message.refusal:
-                logger.warning(
-                    f"Model refused to process section '{title}': {message.refusal}"
-                )
-                return None
+        # Access the parsed data directly from the message
+        if getattr(message, 'parsed', None) is not None:
+            result = message.parsed
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Parsed result: %r", result)
+            logger.info("Successfully processed section '%s'", title)
+            return result
+        else:
+            logger.error(f"No parsed data found in response for section '{title}'")
+            return None
 
-            # Access the parsed data directly from the message
-            if hasattr(message, 'parsed'):
-                result = message.parsed.dict()
-                logger.debug(f"Parsed result: {result}")
-                logger.info(f"Successfully processed section '{title}' -> {result['filename']}")
-                return result
-            else:
-                logger.error(f"No parsed data found in response for section '{title}'")
-                return None
+    async def _call_gpt_async(self, prompt: str, title: str, max_tokens: int,
+                              response_format=ProcessedSection,
+                              prompt_tokens: Optional[int] = None) -> Optional[BaseModel]:
+        """
+        Call GPT with the given prompt, throttled by the shared rate limiter.
+        `max_tokens` caps the reply (see _max_output_tokens). Pass `prompt_tokens`
+        when already known to skip tokenizing the prompt.
+        """
+        try:
+            if prompt_tokens is None:
+                prompt_tokens = self._count_tokens(prompt)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Prompt length: %d chars, %d tokens", len(prompt), prompt_tokens)
+
+            # OpenAI counts max_tokens against the TPM limit, so reserve it up front
+            estimated_tokens = prompt_tokens + max_tokens
+            async with self.rate_limiter.limit(estimated_tokens):
+                logger.info("Processing section '%s' with model %s.", title, self.model)
+                if CONFIG['stream_responses']:
+                    completion = await self._stream_completion(prompt, title, max_tokens, response_format)
+                else:
+                    completion = await self.client.beta.chat.completions.parse(
+                        **self._completion_kwargs(prompt, max_tokens, response_format)
+                    )
+            return self._handle_completion(completion, title)
 
         except Exception as e:
             logger.error(
@@ -321,35 +793,95 @@ class GPTProcessor:
             )
             return None
 
-    def process_section(self, section: Dict[str, str]) -> Optional[Dict]:
+    # Embeddings requests: inputs per request, tokens per input (model limit 8191)
+    # and tokens per request; sections are sent pre-tokenized
+    EMBEDDING_BATCH_SIZE = 256
+    EMBEDDING_MAX_INPUT_TOKENS = 8000
+    EMBEDDING_MAX_REQUEST_TOKENS = 250000
+
+    def _embedding_input(self, section: Dict[str, str]) -> str:
+        """Text embedded for the semantic cache tier."""
+        return f"{section['title']}\n{section['content']}"
+
+    async def _embed_async(self, sections: List[Dict[str, str]]) -> List[List[float]]:
+        """
+        Embed sections for the semantic cache tier, many per request and one request
+        at a time, so a large document doesn't fire one embeddings call per section.
+        """
+        encoder = _get_encoder(self.cache_config['embedding_model'])
+        batches = []
+        batch: List[List[int]] = []
+        batch_tokens = 0
+        for section in sections:
+            tokens = encoder.encode(self._embedding_input(section))[:self.EMBEDDING_MAX_INPUT_TOKENS]
+            if batch and (len(batch) >= self.EMBEDDING_BATCH_SIZE
+                          or batch_tokens + len(tokens) > self.EMBEDDING_MAX_REQUEST_TOKENS):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(tokens)
+            batch_tokens += len(tokens)
+        if batch:
+            batches.append(batch)
+
+        embeddings = []
+        for batch in batches:
+            response = await self.client.embeddings.create(
+                model=self.cache_config['embedding_model'],
+                input=batch
+            )
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return embeddings
+
+    def _store_cache(self, section: Dict[str, str], result: Optional[Dict], embedding: Optional[List[float]]):
+        """Cache a successful result."""
+        if self.cache is not None and result:
+            self.cache.put(section, result, embedding)
+
+    def _with_filename(self, section: Dict[str, str], result: Optional[Dict]) -> Optional[Dict]:
+        """Attach the locally derived output filename to a GPT result."""
+        if not result:
+            return result
+        return {**result, 'filename': section.get('filename') or section_filename(section['title'])}
+
+    async def _stream_completion(self, prompt: str, title: str, max_tokens: int,
+                                 response_format=ProcessedSection):
+        """
+        Stream a structured-output completion and return the final parsed completion.
+        Tokens arrive as they are generated, so the first bytes (and any error) show up
+        early, and long generations don't sit on an idle connection.
+        """
+        started = time.monotonic()
+        first_token_at = None
+        async with self.client.beta.chat.completions.stream(
+            **self._completion_kwargs(prompt, max_tokens, response_format)
+        ) as stream:
+            async for event in stream:
+                if first_token_at is None and event.type == 'content.delta':
+                    first_token_at = time.monotonic()
+                    logger.debug(
+                        "First token for section '%s' after %.2fs", title, first_token_at - started
+                    )
+            return await stream.get_final_completion()
+
+    async def _process_section_uncached_async(self, section: Dict[str, str]) -> Optional[Dict]:
         """Process a single doc section with GPT, return a structured dict or None."""
         try:
-            # Debug input section
-            logger.debug(f"Processing section with title: {section['title']}")
-            logger.debug(f"Section content length: {len(section['content'])} chars")
-            logger.debug(f"Section breadcrumbs: {section.get('breadcrumbs', [])}")
-            
-            prompt = self._create_prompt(section)
-            token_count = self._count_tokens(prompt)
-            
-            # Debug token counts
-            logger.debug(f"Token count for section '{section['title']}': {token_count}")
-            logger.debug(f"Context window size: {self.model_config['context_window']}")
-            
-            if token_count > self.model_config['context_window']:
-                logger.warning(
-                    f"Section '{section['title']}' exceeds token limit "
-                    f"({token_count} > {self.model_config['context_window']}). Splitting..."
+            token_count = self._count_tokens(section['content'])
+            logger.debug("Token count for section '%s': %d", section['title'], token_count)
+
+            if token_count > CONFIG['max_section_tokens']:
+                logger.info(
+                    "Section '%s' exceeds %d tokens (%d). Splitting...",
+                    section['title'], CONFIG['max_section_tokens'], token_count
                 )
-                return self._process_large_section(section)
-            else:
-                result = self._call_gpt(prompt, section["title"])
-                if result:
-                    logger.debug(f"Successfully processed section '{section['title']}'")
-                    logger.debug(f"Result type: {result['section_type']}")
-                    logger.debug(f"Generated filename: {result['filename']}")
-                return result
-                
+                return await self._process_large_section_async(section)
+            return self._combine_results([
+                await self._call_gpt_async(
+                    self._create_prompt(section), section["title"],
+                    max_tokens=self._max_output_tokens(token_count)
+                )
+            ])
+
         except Exception as e:
             logger.error(
                 f"Error processing section '{section['title']}': {str(e)}",
@@ -357,68 +889,404 @@ class GPTProcessor:
             )
             return None
 
-    def _process_large_section(self, section: Dict[str, str]) -> Optional[Dict]:
+    async def _fill_from_cache_async(self, sections: List[Dict[str, str]], results: List[Optional[Dict]]
+                                     ) -> Tuple[List[int], Dict[int, Optional[List[float]]]]:
+        """
+        Look every section up in the cache and put the hits into `results`.
+        Returns (indices of the sections still to process, their embeddings by index);
+        embeddings are computed on a semantic-tier miss so they can be stored afterwards.
+        """
+        embeddings: Dict[int, Optional[List[float]]] = dict.fromkeys(range(len(sections)))
+        if self.cache is None:
+            return list(range(len(sections))), embeddings
+
+        pending = []
+        for i, sec in enumerate(sections):
+            try:
+                cached = self.cache.get(sec)
+            except Exception as e:
+                logger.warning("Cache lookup failed for section '%s': %s", sec['title'], e)
+                cached = None
+            if cached is not None:
+                logger.info("Cache hit for section '%s'", sec['title'])
+                results[i] = self._with_filename(sec, cached)
+            else:
+                pending.append(i)
+
+        if not pending or not self.cache_config['semantic']:
+            return pending, embeddings
+
+        try:
+            vectors = await self._embed_async([sections[i] for i in pending])
+            similar = await self.cache.find_similar_many(vectors)
+        except Exception as e:
+            logger.warning("Semantic cache lookup failed for %d sections: %s", len(pending), e)
+            return pending, embeddings
+
+        misses = []
+        for i, vector, cached in zip(pending, vectors, similar):
+            embeddings[i] = vector
+            if cached is not None:
+                logger.info("Semantic cache hit for section '%s'", sections[i]['title'])
+                results[i] = self._with_filename(sections[i], cached)
+            else:
+                misses.append(i)
+        return misses, embeddings
+
+    async def process_sections_batch(self, sections: List[Dict[str, str]],
+                                     batch_size: Optional[int] = None) -> List[Optional[Dict]]:
+        """
+        Process many sections, packing small uncached ones several to a request.
+        Returns results in the same order as `sections` (None where processing failed).
+        """
+        batch_size = max(1, min(batch_size or CONFIG['sections_per_request'], 16))
+        results: List[Optional[Dict]] = [None] * len(sections)
+        pending, embeddings = await self._fill_from_cache_async(sections, results)
+
+        groups = self._pack_sections([(i, sections[i]) for i in pending], batch_size)
+        outcomes = await asyncio.gather(
+            *(self._process_group(group) for group in groups),
+            return_exceptions=True
+        )
+        for group, outcome in zip(groups, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(
+                    "Error processing sections %s: %s", [sec['title'] for _, sec in group], outcome
+                )
+                continue
+            for (i, sec), result in zip(group, outcome):
+                self._store_cache(sec, result, embeddings[i])
+                results[i] = self._with_filename(sec, result)
+
+        return results
+
+    def _pack_sections(self, indexed_sections: List[Tuple[int, Dict[str, str]]],
+                       batch_size: int) -> List[List[Tuple[int, Dict[str, str]]]]:
+        """
+        Greedily group sections in order, up to batch_size per group and a content
+        budget of half the output limit (the model echoes the content back).
+        Sections that need splitting always go alone.
         """
-        Split a large section by paragraphs (rather than lines) and
-        re-combine results at the end.
+        budget = min(self.model_config['context_window'] // 2,
+                     self.model_config['max_output_tokens'] // 2)
+        groups = []
+        current = []
+        current_tokens = 0
+        for item in indexed_sections:
+            tokens = self._count_tokens(item[1]['content'])
+            if tokens > CONFIG['max_section_tokens']:
+                groups.append([item])
+                continue
+            if current and (len(current) >= batch_size or current_tokens + tokens > budget):
+                groups.append(current)
+                current = []
+                current_tokens = 0
+            current.append(item)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    async def _process_group(self, group: List[Tuple[int, Dict[str, str]]]) -> List[Optional[Dict]]:
+        """Process one packed group; falls back to one request per section if the reply doesn't line up."""
+        sections = [sec for _, sec in group]
+        if len(sections) == 1:
+            return [await self._process_section_uncached_async(sections[0])]
+
+        titles = ", ".join(sec['title'] for sec in sections)
+        content_tokens = sum(self._count_tokens(sec['content']) for sec in sections)
+        result = await self._call_gpt_async(
+            self._create_batch_prompt(sections), titles,
+            max_tokens=self._max_output_tokens(content_tokens, len(sections)),
+            response_format=BatchResult
+        )
+        items = result.items if result else []
+        if len(items) == len(sections):
+            return [item.model_dump() for item in items]
+
+        logger.warning(
+            "Batched request returned %d results for %d sections (%s); processing them individually",
+            len(items), len(sections), titles
+        )
+        return list(await asyncio.gather(
+            *(self._process_section_uncached_async(sec) for sec in sections)
+        ))
+
+    def _iter_split_pieces(self, content: str) -> Iterator[Tuple[str, str, int]]:
         """
-        content = section["content"]
-        paragraphs = content.split("\n\n")  # A naive paragraph split
+        Yield (separator, piece, tokens) for the paragraphs of `content`; a paragraph
+        over CONFIG['max_section_tokens'] is broken into its lines instead.
+        `separator` is what joins the piece to the one before it.
+        """
+        for para in _iter_paragraphs(content):
+            p_tokens = self._count_tokens(para)
+            if p_tokens <= CONFIG['max_section_tokens'] or "\n" not in para:
+                yield "\n\n", para, p_tokens
+                continue
+            for i, line in enumerate(_iter_paragraphs(para, _LINE_RE)):
+                yield ("\n\n" if i == 0 else "\n"), line, self._count_tokens(line)
 
-        # Accumulate small chunks
+    def _split_large_section(self, section: Dict[str, str]) -> List[Dict[str, str]]:
+        """
+        Split a large section by paragraphs (or, for an oversized paragraph, by lines)
+        into sub-sections of at most CONFIG['max_section_tokens'] content tokens
+        (a single oversized line becomes its own chunk). Fenced code blocks are never
+        split, and a heading is never left in a chunk of its own.
+        """
+        # Tokenize each piece once, as it is consumed; chunks carry the summed count ("tokens")
+        pieces = self._iter_split_pieces(section["content"])
+
+        # Accumulate small chunks, in document order (the parts are concatenated back)
         chunked_paragraphs = []
         current_chunk = []
         current_tokens = 0
 
-        for para in paragraphs:
-            p_tokens = self._count_tokens(para)
-            if current_tokens + p_tokens > (self.model_config['context_window'] // 2):
+        for separator, piece, p_tokens in pieces:
+            heading_only = len(current_chunk) == 1 and _HEADING_LINE_RE.fullmatch(current_chunk[0])
+            if (current_chunk and not heading_only
+                    and current_tokens + p_tokens > CONFIG['max_section_tokens']):
                 # Start a new chunk
-                chunked_paragraphs.append("\n\n".join(current_chunk))
-                current_chunk = [para]
+                chunked_paragraphs.append(("".join(current_chunk), current_tokens))
+                current_chunk = [piece]
                 current_tokens = p_tokens
             else:
-                current_chunk.append(para)
+                current_chunk.append(separator + piece if current_chunk else piece)
                 current_tokens += p_tokens
 
         if current_chunk:
-            chunked_paragraphs.append("\n\n".join(current_chunk))
+            chunked_paragraphs.append(("".join(current_chunk), current_tokens))
 
-        # Now process each chunk individually
-        processed_chunks = []
-        for i, chunk_text in enumerate(chunked_paragraphs):
-            sub_section = {
+        return [
+            {
                 "title": f"{section['title']} (Part {i+1})",
                 "content": chunk_text,
-                "breadcrumbs": section.get("breadcrumbs", []) + [f"Part {i+1}"]
+                "tokens": chunk_tokens,
+                "breadcrumbs": section.get("breadcrumbs", []) + [f"Part {i+1}"],
+                "filename": section.get("filename")
             }
-            logger.info(f"Processing chunk {i+1} of section '{section['title']}'")
-            part_result = self.process_section(sub_section)
-            if part_result:
-                processed_chunks.append(part_result)
+            for i, (chunk_text, chunk_tokens) in enumerate(chunked_paragraphs)
+        ]
+
+    def _estimate_prompt_tokens(self, sub_section: Dict) -> int:
+        """Prompt tokens of a split chunk: its known content count plus the prompt template."""
+        return sub_section['tokens'] + self._count_tokens(
+            self._create_prompt({**sub_section, 'content': ''})
+        )
 
-        # If nothing worked, bail
-        if not processed_chunks:
+    def _combine_results(self, processed_chunks: List[Optional[ProcessedSection]]) -> Optional[Dict]:
+        """
+        Merge the results of a (possibly split) section back into a single result dict.
+        This is where GPT results are dumped to dicts, once per section.
+        `processed_chunks` holds one entry per chunk; if any of them failed (None), the
+        section is incomplete and None is returned, so a partial result is never cached.
+        """
+        # If any chunk failed, bail
+        if not processed_chunks or not all(processed_chunks):
             return None
 
         # Combine partial results
-        combined = processed_chunks[0]
-        for part in processed_chunks[1:]:
-            combined['content'] += f"\n\n{part['content']}"
-            combined['related_endpoints'].extend(part['related_endpoints'])
+        combined = processed_chunks[0].model_dump()
+        if len(processed_chunks) > 1:
+            combined['content'] = "\n\n".join(part.content for part in processed_chunks)
+            combined['related_endpoints'] = [
+                endpoint for part in processed_chunks for endpoint in part.related_endpoints
+            ]
 
         return combined
 
-    def _create_prompt(self, section: Dict[str, str]) -> str:
-        """Prompt template for GPT model."""
-        return f"""
-Analyze the following HTML documentation section and provide a structured breakdown.
+    async def _process_large_section_async(self, section: Dict[str, str]) -> Optional[Dict]:
+        """Process the chunks of a large section concurrently and re-combine them."""
+        sub_sections = self._split_large_section(section)
+        logger.info("Processing %d chunks of section '%s'", len(sub_sections), section['title'])
+        processed_chunks = await asyncio.gather(
+            *(
+                self._call_gpt_async(
+                    self._create_prompt(sub_section), sub_section['title'],
+                    max_tokens=self._max_output_tokens(sub_section['tokens']),
+                    prompt_tokens=self._estimate_prompt_tokens(sub_section)
+                )
+                for sub_section in sub_sections
+            )
+        )
+        return self._combine_results(list(processed_chunks))
 
-Title: {section['title']}
-Content: {section['content']}
+    def _request_chunks(self, section: Dict[str, str]) -> List[Dict[str, str]]:
+        """The section itself, or its chunks when it exceeds CONFIG['max_section_tokens']."""
+        if self._count_tokens(section['content']) > CONFIG['max_section_tokens']:
+            return self._split_large_section(section)
+        return [section]
 
-Format your response to match these exact field requirements:
+    async def submit_batch(self, sections: List[Dict[str, str]]) -> str:
+        """
+        Upload one Batch API request per section and start the batch; returns its id.
+        Oversized sections are submitted as several chunk requests. Request ids are
+        "sec-<section index>-<chunk index>", as used by _collect_batch to merge them.
+        """
+        lines = []
+        for i, section in enumerate(sections):
+            for j, sub_section in enumerate(self._request_chunks(section)):
+                lines.append(orjson.dumps({
+                    "custom_id": f"sec-{i}-{j}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.model,
+                        "messages": self._build_messages(self._create_prompt(sub_section)),
+                        "response_format": processed_section_response_format(),
+                        "max_tokens": self._max_output_tokens(
+                            sub_section.get('tokens') or self._count_tokens(sub_section['content'])
+                        )
+                    }
+                }))
+
+        batch_file = await self.client.files.create(
+            file=("sections.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted batch {batch.id} with {len(lines)} requests for {len(sections)} sections")
+        return batch.id
+
+    async def retrieve_batch(self, batch_id: str) -> Dict[str, Optional[ProcessedSection]]:
+        """
+        Wait for a batch to finish and return its ProcessedSections keyed by
+        custom_id (None for failed requests; empty if the batch itself failed).
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+            await asyncio.sleep(CONFIG['batch_poll_interval'])
+            batch = await self.client.batches.retrieve(batch_id)
+            logger.debug("Batch %s status: %s (%s)", batch.id, batch.status, batch.request_counts)
+
+        if batch.status != 'completed' or not batch.output_file_id:
+            logger.error(f"Batch {batch.id} ended with status '{batch.status}'")
+            return {}
+
+        records = {}
+        output = (await self.client.files.content(batch.output_file_id)).content
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            records[record['custom_id']] = self._parse_batch_record(record)
+        return records
+
+    def _batch_state_dir(self) -> str:
+        """Directory of the batches this model has submitted but not yet collected."""
+        return os.path.join(cache_dir, 'batches', self.model)
+
+    def _batch_state_path(self, batch_id: str) -> str:
+        """Where a submitted batch's sections are recorded until its results are collected."""
+        return os.path.join(self._batch_state_dir(), f"{batch_id}.json")
+
+    def _save_batch_state(self, batch_id: str, sections: List[Dict[str, str]], chunk_counts: List[int]):
+        """Record a submitted batch, so a later run can collect it if this one dies while waiting."""
+        path = self._batch_state_path(batch_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps({
+                'batch_id': batch_id,
+                'prompt_version': PROMPT_VERSION,
+                'sections': sections,
+                'chunk_counts': chunk_counts
+            }))
+
+    async def _collect_batch(self, batch_id: str, sections: List[Dict[str, str]], chunk_counts: List[int],
+                             embeddings: Optional[List[Optional[List[float]]]] = None) -> List[Optional[Dict]]:
+        """
+        Wait for a batch, merge each section's chunk results and cache them.
+        Returns results in the same order as `sections`.
+        """
+        records = await self.retrieve_batch(batch_id)
+        results = []
+        for position, (section, chunk_count) in enumerate(zip(sections, chunk_counts)):
+            # Failed requests are missing from the output file; they count as failed chunks
+            chunks = [records.get(f"sec-{position}-{part}") for part in range(chunk_count)]
+            result = self._combine_results(chunks)
+            self._store_cache(section, result, embeddings[position] if embeddings else None)
+            results.append(result)
+
+        state_path = self._batch_state_path(batch_id)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return results
+
+    async def collect_pending_batches(self):
+        """
+        Collect batches submitted by earlier runs that stopped before their results
+        arrived (see _save_batch_state), so their paid results land in the cache.
+        """
+        state_dir = self._batch_state_dir()
+        if self.cache is None or not os.path.isdir(state_dir):
+            return
+        collections = []
+        for path in sorted(glob.glob(os.path.join(glob.escape(state_dir), '*.json'))):
+            with open(path, 'rb') as f:
+                state = orjson.loads(f.read())
+            if state['prompt_version'] != PROMPT_VERSION:
+                logger.warning(f"Discarding batch {state['batch_id']} from an older prompt version")
+                os.remove(path)
+                continue
+            logger.info(f"Collecting batch {state['batch_id']} submitted by an earlier run")
+            collections.append(
+                self._collect_batch(state['batch_id'], state['sections'], state['chunk_counts'])
+            )
+        await asyncio.gather(*collections)
+
+    async def run_batch_job(self, sections: List[Dict[str, str]]) -> List[Optional[Dict]]:
+        """
+        Process sections through the OpenAI Batch API (50% cheaper, separate rate limits).
+        Waits until the batch finishes; returns results in the same order as `sections`,
+        with the chunks of oversized sections merged like in _process_large_section_async.
+        Batches left over by earlier runs are collected first, cached sections are not
+        submitted, and new results are cached.
+        """
+        await self.collect_pending_batches()
+
+        results: List[Optional[Dict]] = [None] * len(sections)
+        pending, embeddings = await self._fill_from_cache_async(sections, results)
+        if not pending:
+            return results
+
+        batch_sections = [sections[index] for index in pending]
+        chunk_counts = [len(self._request_chunks(section)) for section in batch_sections]
+        batch_id = await self.submit_batch(batch_sections)
+        if self.cache is not None:
+            self._save_batch_state(batch_id, batch_sections, chunk_counts)
+
+        batch_results = await self._collect_batch(
+            batch_id, batch_sections, chunk_counts, [embeddings[index] for index in pending]
+        )
+        for index, result in zip(pending, batch_results):
+            results[index] = self._with_filename(sections[index], result)
+
+        logger.info(f"Batch completed: {sum(1 for r in results if r)} of {len(sections)} sections processed")
+        return results
+
+    def _parse_batch_record(self, record: Dict) -> Optional[ProcessedSection]:
+        """Turn one line of a Batch API output file into a ProcessedSection."""
+        request_id = record.get('custom_id')
+        response = record.get('response') or {}
+        if record.get('error') or response.get('status_code') != 200:
+            logger.error(f"Batch request '{request_id}' failed: {record.get('error') or response}")
+            return None
+
+        try:
+            message = response['body']['choices'][0]['message']
+            if message.get('refusal'):
+                logger.warning(f"Model refused batch request '{request_id}': {message['refusal']}")
+                return None
+            return ProcessedSection.model_validate_json(message['content'])
+        except Exception as e:
+            logger.error(f"Invalid batch output for request '{request_id}': {str(e)}")
+            return None
 
+    # Field requirements shared by the single-section and batched prompts
+    FIELD_INSTRUCTIONS = """
 - section_type: Must be one of ["endpoint", "concept", "overview", "other"]
   Choose based on the content type:
   - "endpoint" for API endpoint documentation
@@ -429,13 +1297,37 @@ Format your response to match these exact field requirements:
 - related_endpoints: A list of strings containing any API endpoints mentioned
   in the content. Return an empty list if none found.
 
-- filename: Create a URL-safe filename ending in .md.
-  Convert spaces to hyphens, remove special characters, use lowercase.
-
-- content: The section content converted to well-formatted Markdown.
-  Ensure proper heading hierarchy and code block formatting.
+- content: The section content as Markdown. Keep the wording as-is; only fix
+  heading hierarchy and code block formatting where needed.
 """
 
+    def _create_prompt(self, section: Dict[str, str]) -> str:
+        """Prompt template for GPT model. Bump PROMPT_VERSION when changing it."""
+        return f"""
+Analyze the following documentation section (already converted to Markdown)
+and provide a structured breakdown.
+
+Title: {section['title']}
+Content: {section['content']}
+
+Format your response to match these exact field requirements:
+{self.FIELD_INSTRUCTIONS}"""
+
+    def _create_batch_prompt(self, sections: List[Dict[str, str]]) -> str:
+        """Prompt for several sections in one request; items come back in section order."""
+        parts = [
+            f"===SECTION {i}===\nTitle: {sec['title']}\nContent: {sec['content']}\n"
+            for i, sec in enumerate(sections, 1)
+        ]
+        return f"""
+Analyze the following {len(sections)} documentation sections (already converted
+to Markdown) and provide a structured breakdown of each one.
+
+{''.join(parts)}
+Return exactly {len(sections)} items, one per section and in the same order.
+Format each item to match these exact field requirements:
+{self.FIELD_INSTRUCTIONS}"""
+
 
 # ---------------------------------------------------------------------------
 # FileGenerator
@@ -447,49 +1339,81 @@ class FileGenerator:
         self.output_dir = output_dir
         self._create_directory_structure()
 
-    def _create_directory_structure(self):
+    def _create_directory_structure(self, output_subdir: str = ''):
         """Creates the necessary directory structure for output files."""
         for dir_name in ['endpoints', 'concepts', 'overview']:
-            dir_path = os.path.join(self.output_dir, dir_name)
+            dir_path = os.path.join(self.output_dir, output_subdir, dir_name)
             os.makedirs(dir_path, exist_ok=True)
 
-    def generate_files(self, processed_sections: List[Dict]):
-        """Generates files from processed documentation sections."""
+    # Large write buffer so each file goes out in as few write() syscalls as possible
+    WRITE_BUFFER_SIZE = 1 << 20
+    # File writes release the GIL, so a few threads overlap open/write/close syscalls
+    WRITE_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+
+    def _subdir_for(self, section_type: str) -> str:
+        """Map a section_type to its output subdirectory."""
+        if section_type == 'concept':
+            return 'concepts'
+        if section_type in ('overview', 'other'):
+            return 'overview'
+        return 'endpoints'
+
+    def _write_one(self, write: Tuple[str, str, str]) -> bool:
+        """Write one (subdir, filename, content) file; returns whether it succeeded."""
+        subdir, filename, content = write
+        file_path = os.path.join(self.output_dir, subdir, filename)
+        try:
+            with open(file_path, 'w', encoding='utf-8', buffering=self.WRITE_BUFFER_SIZE) as f:
+                f.write(content)
+            logger.debug("Wrote file: %s", file_path)
+            return True
+        except Exception as e:
+            logger.error(
+                f"Error writing file {file_path}: {e}",
+                exc_info=True
+            )
+            return False
+
+    def generate_files(self, processed_sections: List[Dict], output_subdir: str = ''):
+        """
+        Generates files from processed documentation sections, under `output_subdir`
+        of the output directory when given (one per input file in multi-file runs).
+        """
         logger.info(f"Generating files for {len(processed_sections)} processed sections")
+        if output_subdir:
+            self._create_directory_structure(output_subdir)
 
+        # Resolve every output path up front, grouped by subdirectory
+        writes = []
         for section in processed_sections:
             if not section:
                 logger.warning("Skipping None section")
                 continue
-
             try:
-                # Determine the appropriate subdirectory
-                s_type = section['section_type']
-                subdir = 'endpoints'
-                if s_type == 'concept':
-                    subdir = 'concepts'
-                elif s_type in ('overview', 'other'):
-                    subdir = 'overview'
-
-                file_path = os.path.join(
-                    self.output_dir, subdir, section['filename']
-                )
-                logger.info(f"Writing file: {file_path}")
-
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(section['content'])
-
-                logger.info(f"Successfully wrote file: {file_path}")
+                subdir = os.path.join(output_subdir, self._subdir_for(section['section_type']))
+                writes.append((subdir, section['filename'], section['content']))
             except Exception as e:
                 logger.error(
-                    f"Error writing file for section: {e}",
+                    f"Error preparing file for section: {e}",
                     exc_info=True
                 )
+        writes.sort(key=lambda item: item[0])
+
+        with ThreadPoolExecutor(max_workers=self.WRITE_WORKERS) as executor:
+            written = sum(executor.map(self._write_one, writes))
+
+        logger.info(f"Wrote {written} of {len(writes)} files to {os.path.join(self.output_dir, output_subdir)}")
 
 
 # ---------------------------------------------------------------------------
 # DocumentationOrganizer
 # ---------------------------------------------------------------------------
+def _parse_one(input_file: str) -> List[Dict[str, str]]:
+    """Parse one HTML file into flattened sections (module-level so worker processes can pickle it)."""
+    with open(input_file, 'rb') as f:
+        return HTMLParser(f).split_into_sections()
+
+
 class DocumentationOrganizer:
     """Orchestrates the entire documentation organization process."""
 
@@ -497,31 +1421,260 @@ class DocumentationOrganizer:
         self.output_dir = output_dir
         self.gpt_processor = GPTProcessor()
         self.file_generator = FileGenerator(output_dir)
+        # Input file -> output subdirectory; set for multi-file runs (see _assign_output_subdirs)
+        self._output_subdirs: Dict[str, str] = {}
 
-    def process_file(self, input_file: str) -> None:
-        """Process a single HTML documentation file."""
+    def _assign_output_subdirs(self, input_files: List[str]):
+        """
+        Give each input file of a multi-file run its own output subdirectory, named
+        after the file. Filenames are only unique within one document, so files
+        sharing output_dir would overwrite each other's sections. Names are assigned
+        in input order, so they are the same on every run.
+        """
+        self._output_subdirs = {}
+        if len(input_files) < 2:
+            return
+        used = set()
+        for input_file in input_files:
+            base = slugify(os.path.splitext(os.path.basename(input_file))[0], max_length=60) or 'document'
+            name, counter = base, 1
+            while name in used:
+                counter += 1
+                name = f"{base}-{counter}"
+            used.add(name)
+            self._output_subdirs[input_file] = name
+
+    async def _write_results(self, input_file: str, processed_sections: List[Dict]):
+        """
+        Write an input file's processed sections to its output location, in a worker
+        thread so GPT calls for other files keep streaming meanwhile.
+        """
+        await asyncio.to_thread(
+            self.file_generator.generate_files,
+            processed_sections, self._output_subdirs.get(input_file, '')
+        )
+
+    def _file_cache_path(self, input_file: str) -> Optional[str]:
+        """
+        Path of the file-level result cache entry for an input file, keyed on the
+        HTML bytes, model and PROMPT_VERSION (None when caching is disabled).
+        """
+        if not CONFIG['cache']['enabled']:
+            return None
+        with open(input_file, 'rb') as f:
+            html_hash = hashlib.sha256(f.read()).hexdigest()
+        return os.path.join(
+            cache_dir, 'files', self.gpt_processor.model, f"{html_hash}-v{PROMPT_VERSION}.json"
+        )
+
+    def _load_file_results(self, input_file: str) -> Tuple[Optional[str], Optional[List[Dict]]]:
+        """Return (cache path, cached processed sections or None) for an input file."""
+        cache_path = self._file_cache_path(input_file)
+        if cache_path is None or not os.path.exists(cache_path):
+            return cache_path, None
+        try:
+            with open(cache_path, 'rb') as f:
+                return cache_path, orjson.loads(f.read())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable file cache {cache_path}: {str(e)}")
+            return cache_path, None
+
+    def _store_file_results(self, cache_path: Optional[str], results: List[Optional[Dict]]):
+        """Cache a file's processed sections, but only if every section succeeded."""
+        if cache_path is None or not all(results):
+            return
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(results))
+        os.replace(tmp_path, cache_path)
+
+    async def _generate_from_cache(self, input_file: str) -> Tuple[Optional[str], bool]:
+        """
+        Write output straight from the file-level cache when the input is unchanged.
+        Returns (cache path, whether it was a hit).
+        """
+        cache_path, cached = await asyncio.to_thread(self._load_file_results, input_file)
+        if cached is None:
+            return cache_path, False
+        logger.info(f"Unchanged input, using cached results for {input_file}")
+        await self._write_results(input_file, cached)
+        return cache_path, True
+
+    async def _load_sections_async(self, input_file: str) -> List[Dict[str, str]]:
+        """
+        Read an HTML documentation file and split it into flattened sections;
+        parsing runs off the event loop.
+        """
         logger.info(f"Processing file: {input_file}")
+        with open(input_file, 'rb') as f:
+            parser = await HTMLParser.create(f)
+        sections = await asyncio.to_thread(parser.split_into_sections)
+        logger.info(f"Flattened to {len(sections)} total sections")
+        return sections
 
-        # Load HTML
-        with open(input_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+    def process_file(self, input_file: str) -> None:
+        """
+        Process a single HTML documentation file. Sections go to GPT
+        concurrently (see process_file_async).
+        """
+        async def run():
+            async with self.gpt_processor:
+                await self.process_file_async(input_file)
 
-        # Parse sections
-        parser = HTMLParser(html_content)
-        sections = parser.split_into_sections()
-        logger.info(f"Flattened to {len(sections)} total sections")
+        asyncio.run(run())
 
-        # GPT-process each
-        processed_sections = []
-        for sec in sections:
-            processed = self.gpt_processor.process_section(sec)
-            if processed:
-                processed_sections.append(processed)
+    async def process_file_async(self, input_file: str) -> None:
+        """
+        Process a single HTML documentation file, sending sections to GPT
+        concurrently. Concurrency and request/token rates are bounded by the
+        GPTProcessor's rate limiter.
+        """
+        cache_path, hit = await self._generate_from_cache(input_file)
+        if hit:
+            return
+        sections = await self._load_sections_async(input_file)
+        results = await self._process_sections_async(input_file, sections)
+        self._store_file_results(cache_path, results)
+
+    async def _process_sections_async(self, input_file: str,
+                                      sections: List[Dict[str, str]]) -> List[Optional[Dict]]:
+        """Send sections to GPT concurrently and write the results; returns them in section order."""
+        results = await self.gpt_processor.process_sections_batch(sections)
+        processed_sections = [result for result in results if result]
 
         logger.info(f"Successfully processed {len(processed_sections)} sections")
 
         # Generate output files
-        self.file_generator.generate_files(processed_sections)
+        await self._write_results(input_file, processed_sections)
+        return results
+
+    def process_files(self, input_files: List[str]) -> None:
+        """
+        Process several HTML documentation files. Parsing is CPU-bound, so files
+        are parsed in parallel worker processes; each file's sections go to the
+        async GPT pipeline as soon as that file is parsed.
+        """
+        async def run():
+            async with self.gpt_processor:
+                await self.process_files_async(input_files)
+
+        asyncio.run(run())
+
+    @staticmethod
+    def html_files_in(input_dir: str) -> List[str]:
+        """HTML files directly inside a directory, in a stable order."""
+        return sorted(
+            path for pattern in ('*.html', '*.htm')
+            for path in glob.glob(os.path.join(glob.escape(input_dir), pattern))
+        )
+
+    def process_directory(self, input_dir: str) -> None:
+        """
+        Process every HTML file in a directory with this organizer's single
+        GPTProcessor, so the client, connection pool, rate limiter and caches
+        are shared across all files.
+        """
+        input_files = self.html_files_in(input_dir)
+        if not input_files:
+            logger.warning(f"No HTML files found in {input_dir}")
+            return
+        logger.info(f"Processing {len(input_files)} HTML files from {input_dir}")
+        self.process_files(input_files)
+
+    async def process_files_async(self, input_files: List[str]) -> None:
+        """
+        Async counterpart of process_files. With several inputs, each file's output
+        goes to its own subdirectory of output_dir.
+        """
+        self._assign_output_subdirs(input_files)
+        loop = asyncio.get_running_loop()
+        max_workers = max(1, min(len(input_files), os.cpu_count() or 1))
+
+        # Spawn rather than fork: the log listener and to_thread workers are running, and a
+        # forked child could inherit a lock one of them holds; spawned workers log directly
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')
+        ) as pool:
+            async def process_one(input_file: str) -> None:
+                cache_path, hit = await self._generate_from_cache(input_file)
+                if hit:
+                    return
+                logger.info(f"Processing file: {input_file}")
+                sections = await loop.run_in_executor(pool, _parse_one, input_file)
+                logger.info(f"Flattened {input_file} to {len(sections)} total sections")
+                results = await self._process_sections_async(input_file, sections)
+                self._store_file_results(cache_path, results)
+
+            results = await asyncio.gather(
+                *(process_one(input_file) for input_file in input_files),
+                return_exceptions=True
+            )
+
+        failed = 0
+        for input_file, result in zip(input_files, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing file '{input_file}': {result}")
+                failed += 1
+        if failed:
+            raise RuntimeError(f"{failed} of {len(input_files)} files failed to process")
+
+    def process_file_batch(self, input_file: str) -> None:
+        """Process a single HTML documentation file through the OpenAI Batch API (see process_files_batch)."""
+        self.process_files_batch([input_file])
+
+    def process_files_batch(self, input_files: List[str]) -> None:
+        """
+        Process HTML documentation files through the OpenAI Batch API, with the
+        uncached sections of every file submitted together as one batch job.
+        Intended for offline runs; if all files together have few sections, they
+        are processed directly instead.
+        """
+        async def run():
+            async with self.gpt_processor:
+                await self.process_files_batch_async(input_files)
+
+        asyncio.run(run())
+
+    async def process_files_batch_async(self, input_files: List[str]) -> None:
+        """Async counterpart of process_files_batch."""
+        self._assign_output_subdirs(input_files)
+
+        async def load(input_file: str) -> Tuple[Optional[str], Optional[List[Dict[str, str]]]]:
+            cache_path, hit = await self._generate_from_cache(input_file)
+            if hit:
+                return cache_path, None
+            return cache_path, await self._load_sections_async(input_file)
+
+        loaded = await asyncio.gather(*(load(input_file) for input_file in input_files))
+        to_process = [
+            (input_file, cache_path, sections)
+            for input_file, (cache_path, sections) in zip(input_files, loaded)
+            if sections is not None
+        ]
+        all_sections = [section for _, _, sections in to_process for section in sections]
+        if not all_sections:
+            return
+
+        if len(all_sections) < CONFIG['batch_min_sections']:
+            logger.info(
+                f"Only {len(all_sections)} sections, processing directly instead of via the Batch API"
+            )
+            results = await self.gpt_processor.process_sections_batch(all_sections)
+        else:
+            results = await self.gpt_processor.run_batch_job(all_sections)
+
+        # Hand each file its slice of the results, in section order
+        offset = 0
+        for input_file, cache_path, sections in to_process:
+            file_results = results[offset:offset + len(sections)]
+            offset += len(sections)
+            processed_sections = [p for p in file_results if p]
+            logger.info(f"Successfully processed {len(processed_sections)} sections of {input_file}")
+
+            # Generate output files
+            await self._write_results(input_file, processed_sections)
+            self._store_file_results(cache_path, file_results)
 
 
 # ---------------------------------------------------------------------------
@@ -529,6 +1682,23 @@ class DocumentationOrganizer:
 # ---------------------------------------------------------------------------
 def main():
     """Main entry point for the documentation organizer."""
+    # Example usage
+    default_input = r"C:\Users\WilliamKraft\Documents\Coding Projects\Documentation_Organizer\example_documentation\alpha_vantage\API Documentation _ Alpha Vantage.html"
+    default_output = r"C:\Users\WilliamKraft\Documents\Coding Projects\Documentation_Organizer\example_documentation\alpha_vantage\organized"
+
+    parser = argparse.ArgumentParser(
+        description="Split HTML API documentation into organized Markdown files using GPT."
+    )
+    parser.add_argument('input_files', nargs='*', default=[default_input],
+                        help="HTML documentation file(s), or directories of them, to process")
+    parser.add_argument('-o', '--output-dir', default=default_output,
+                        help="Directory for the organized Markdown output "
+                             "(one subdirectory per input file when there are several)")
+    parser.add_argument('--batch', action='store_true',
+                        help="Use the OpenAI Batch API (50%% cheaper, results within 24h) for offline runs; "
+                             "a batch left waiting by an interrupted run is collected by the next one")
+    args = parser.parse_args()
+
     load_dotenv()
 
     # Ensure OpenAI API key is set
@@ -536,14 +1706,25 @@ def main():
         print("Error: OPENAI_API_KEY environment variable is not set")
         return
 
-    # Example usage
-    input_file = r"C:\Users\WilliamKraft\Documents\Coding Projects\Documentation_Organizer\example_documentation\alpha_vantage\API Documentation _ Alpha Vantage.html"
-    output_dir = r"C:\Users\WilliamKraft\Documents\Coding Projects\Documentation_Organizer\example_documentation\alpha_vantage\organized"
+    # One organizer (and so one GPTProcessor) for every input
+    organizer = DocumentationOrganizer(args.output_dir)
+    input_files = [
+        input_file
+        for path in args.input_files
+        for input_file in (organizer.html_files_in(path) if os.path.isdir(path) else [path])
+    ]
+    if not input_files:
+        print(f"Error: no HTML files found in {', '.join(args.input_files)}")
+        return
 
-    organizer = DocumentationOrganizer(output_dir)
     try:
-        organizer.process_file(input_file)
-        print(f"Documentation successfully organized in: {output_dir}")
+        if args.batch:
+            organizer.process_files_batch(input_files)
+        elif len(input_files) == 1:
+            organizer.process_file(input_files[0])
+        else:
+            organizer.process_files(input_files)
+        print(f"Documentation successfully organized in: {args.output_dir}")
     except Exception as e:
         print(f"Error processing documentation: {str(e)}")
 